@@ -43,16 +43,18 @@ TROVE_CLASSIFIERS = \
      'License :: OSI Approved :: GNU Lesser General Public License v3'
       ' (LGPLv3)',
      'Operating System :: POSIX',
-     'Programming Language :: Python :: 2.7',
+     'Programming Language :: Python :: 3',
      'Topic :: Software Development :: Libraries :: Python Modules',
      )
 
 
 # dependencies ----------------------------------------------------------------
 
+PYTHON_REQUIRES = '>=3.8'
+
 SETUP_DEPS = ()
 
-INSTALL_DEPS = ('spruce-collections',)
+INSTALL_DEPS = ()
 
 EXTRAS_DEPS = {}
 
@@ -79,9 +81,9 @@ TESTS_PKG = '.'.join((ROOT_PKG, 'tests'))
 STD_SCRIPTS_PKG_COMMANDS = {}
 
 COMMANDS = {cmd: '{}.{}:{}'.format(SCRIPTS_PKG,
-                                   script if isinstance(script, basestring)
+                                   script if isinstance(script, str)
                                           else script[0],
-                                   'main' if isinstance(script, basestring)
+                                   'main' if isinstance(script, str)
                                           else script[1])
             for cmd, script in STD_SCRIPTS_PKG_COMMANDS.items()}
 
@@ -101,6 +103,7 @@ if __name__ == '__main__':
            maintainer_email=__email__,
            license=LICENSE,
            classifiers=TROVE_CLASSIFIERS,
+           python_requires=PYTHON_REQUIRES,
            setup_requires=SETUP_DEPS,
            install_requires=INSTALL_DEPS,
            extras_require=EXTRAS_DEPS,
@@ -147,7 +147,26 @@ __maintainer__ = "Ivan D Vasin"
 __email__ = "nisavid@gmail.com"
 __docformat__ = "restructuredtext"
 
-from ._conf import *
-from ._core import *
-from ._exc import *
-from ._inmemory import *
+from importlib import import_module as _import_module
+
+from . import _inmemory
+from ._core import Settings
+from ._exc import Error, Exception, InvalidSettingsValue, \
+                  MalformedSettingsLocation, MissingRequiredSettingsValue
+
+
+_LAZY_MODULES = ('_conf',)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_MODULES))
+
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        return _import_module('.' + name, __name__)
+    raise AttributeError('module {!r} has no attribute {!r}'
+                          .format(__name__, name))
+
+
+Settings._register_format_module('conf', __name__ + '._conf')
@@ -1,84 +1,304 @@
 """Conf format
 
-The conf format is registered by default.  It reads and writes settings
-using :mod:`ConfigParser` at locations that are similar to typical Unix
+The conf format is registered by default, though this module is not
+loaded until the format is first used.  It reads and writes settings
+using :mod:`configparser` at locations that are similar to typical Unix
 configuration files---that is, in :file:`.conf` files specific to each
 component scope under :file:`/etc/{organization}` for system-wide
 settings and under :file:`~/.{organization}` for user-specific settings.
 
+Files must be encoded in UTF-8.  A file that cannot be decoded is reported
+as a :exc:`~spruce.settings.MalformedSettingsLocation`.
+
+A file found to be missing is not looked for again by the automatic
+synchronizations of the next few seconds, since most fallback locations
+typically do not exist.  An explicit :meth:`~spruce.settings.Settings.sync`
+always looks for every location.
+
 """
 
 __copyright__ = "Copyright (C) 2014 Ivan D Vasin"
 __docformat__ = "restructuredtext"
 
-import ConfigParser as _configparser
-# TODO: (Python 3)
-#import configparser as _configparser
+__all__ = []
+
+import configparser as _configparser
+import functools as _functools
 import os as _os
+import re as _re
+import sys as _sys
+import time as _time
 
 from . import _core
 from . import _exc
 
 
-def _read_settings(file_, keys):
+_DEFAULT_PATHS = \
+    (('system', 'organization',
+      '/etc/{organization}/{organization}{extension}'),
+     ('system', 'application',
+      '/etc/{organization}/{application}{extension}'),
+     ('system', 'subsystem',
+      '/etc/{organization}/{application}/{subsystem}{extension}'),
+     ('user', 'organization', '~/.{organization}/{organization}{extension}'),
+     ('user', 'application', '~/.{organization}/{application}{extension}'),
+     ('user', 'subsystem',
+      '~/.{organization}/{application}/{subsystem}{extension}'),
+     )
 
-    settings = {}
+_MISSING_FILE_TTL = 2
 
-    parser = _configparser.RawConfigParser(allow_no_value=True)
-    parser.read(file_)
+_PARSER_CACHE_MAXSIZE = 128
 
-    if keys == ['']:
-        for section in parser.sections():
-            for subkey, value in parser.items(section):
-                settings[section + '/' + subkey] = value
-    else:
-        for key in keys:
-            section, _, subkey = key.rpartition('/')
-            if not section:
-                section = _configparser.DEFAULTSECT
-
-            if parser.has_section(section) \
-                   and parser.has_option(section, subkey):
-                try:
-                    settings[key] = parser.get(section, subkey)
-                except _configparser.Error as exc:
-                    raise _exc.MalformedSettingsLocation(message=str(exc))
+_OPTION_RE = _re.compile(br'(?P<option>[^:=\s][^:=]*)[:=]\s*(?P<value>.*)$')
+
+_SECTION_RE = _re.compile(br'\[(?P<header>.+)\]')
+
+_missing_files = {}
+
+_parser_cache = {}
+
+
+@_functools.lru_cache(maxsize=4096)
+def _flat_key(key):
+
+    """The key under which some setting is mapped by :func:`_parse_conf`
+
+    The option name is normalized as by
+    :meth:`configparser.RawConfigParser.optionxform`, and the result is
+    interned so that probing a parsed mapping can short-circuit on identity.
+
+    :param str key:
+        A settings key.
+
+    :rtype: :obj:`str`
+
+    """
+
+    section, _, option = key.rpartition('/')
+    option = option.lower()
+    return _sys.intern(section + '/' + option if section else option)
+
+
+def _load_settings(file_):
+
+    """The settings in some file
+
+    The parsed result is memoized by the file's absolute path, modification
+    time, and size, so repeated reads of an unchanged file skip parsing.  A
+    file that cannot be inspected is treated as empty, and it is not
+    inspected again for :data:`_MISSING_FILE_TTL` seconds, unless
+    :func:`_forget_missing_files` is called for it first.  This matters
+    because most fallback locations typically do not exist.  A file that
+    can be inspected but not opened is also treated as empty, but that
+    result is not memoized, so the file is read once its permissions allow
+    it.
+
+    .. seealso:: :func:`_parse_conf`
+
+    :param str file_:
+        A file path.
+
+    :return:
+        A mapping of all keys to their values.
+    :rtype: {:obj:`str`: :obj:`str`}
+
+    """
+
+    path = _os.path.abspath(file_)
+
+    missing_time = _missing_files.get(path)
+    if missing_time is not None \
+           and _time.monotonic() - missing_time < _MISSING_FILE_TTL:
+        return {}
+
+    try:
+        stat = _os.stat(path)
+    except OSError:
+        _missing_files[path] = _time.monotonic()
+        return {}
+    cache_key = (path, stat.st_mtime_ns, stat.st_size)
+
+    try:
+        return _parser_cache[cache_key]
+    except KeyError:
+        pass
+
+    try:
+        settings = _parse_conf(path)
+    except OSError:
+        return {}
+
+    while len(_parser_cache) >= _PARSER_CACHE_MAXSIZE:
+        del _parser_cache[next(iter(_parser_cache))]
+    _parser_cache[cache_key] = settings
+
+    return settings
+
+
+def _parse_conf(path):
+
+    """Parse the settings in some file
+
+    Files are read as UTF-8, and the whole file is validated once before it
+    is parsed, so that the same files are rejected whichever parser handles
+    them.  Files that consist only of section headers, ``option = value``
+    lines, comments, and blank lines are tokenized directly from the raw
+    bytes, and only the captured names and values are decoded.  Any other
+    file---for example, one that contains continuation lines, valueless
+    options, or duplicate sections---is handed to
+    :func:`_parse_conf_with_configparser`, which also diagnoses malformed
+    files.
+
+    :param str path:
+        A file path.
+
+    :return:
+        A mapping of all keys (in :samp:`{section}/{option}` form) to their
+        values.  Options in the default section are mapped both under each
+        section and under their bare option names, which is where keys that
+        do not belong to a group are stored.
+    :rtype: {:obj:`str`: :obj:`str`}
+
+    :raise OSError:
+        Raised if the file cannot be read.
+
+    :raise spruce.settings.MalformedSettingsLocation:
+        Raised if the file is malformed or is not valid UTF-8.
+
+    """
+
+    with open(path, 'rb') as file_:
+        data = file_.read()
+
+    try:
+        data.decode('utf-8')
+    except UnicodeDecodeError as exc:
+        raise _exc.MalformedSettingsLocation(message=str(exc))
+
+    return _tokenize_conf(path, data)
+
+
+def _tokenize_conf(path, data):
+
+    """Tokenize the settings in the raw contents of some file
+
+    This is the fast path of :func:`_parse_conf`.  It expects *data* to be
+    valid UTF-8.
+
+    """
+
+    defaults = {}
+    sections = {}
+    options = None
+    for line in data.splitlines():
+        if not line.strip() or line[:1] in (b'#', b';'):
+            continue
+        if line[:1].isspace() or line[0] > 0x7f:
+            return _parse_conf_with_configparser(path)
+
+        match = _SECTION_RE.match(line)
+        if match:
+            section = match.group('header').decode('utf-8')
+            if section == _configparser.DEFAULTSECT:
+                options = defaults
+            elif section in sections:
+                return _parse_conf_with_configparser(path)
             else:
-                settings[key] = None
+                options = sections[section] = {}
+            continue
 
+        match = _OPTION_RE.match(line)
+        if options is None or not match:
+            return _parse_conf_with_configparser(path)
+        option = match.group('option').decode('utf-8').rstrip().lower()
+        if option in options:
+            return _parse_conf_with_configparser(path)
+        options[option] = match.group('value').decode('utf-8').strip()
+
+    intern = _sys.intern
+    settings = {intern(option): value for option, value in defaults.items()}
+    for section, options in sections.items():
+        prefix = section + '/'
+        settings.update((intern(prefix + option), value)
+                        for option, value in defaults.items())
+        settings.update((intern(prefix + option), value)
+                        for option, value in options.items())
     return settings
 
 
+def _parse_conf_with_configparser(path):
+
+    """Parse the settings in some file using :mod:`configparser`
+
+    .. seealso:: :func:`_parse_conf`
+
+    """
+
+    parser = _configparser.RawConfigParser(allow_no_value=True)
+    try:
+        parser.read(path, encoding='utf-8')
+    except (_configparser.Error, UnicodeDecodeError) as exc:
+        raise _exc.MalformedSettingsLocation(message=str(exc))
+
+    settings = dict(parser.defaults())
+    for section in parser.sections():
+        settings.update((section + '/' + subkey, value)
+                        for subkey, value in parser.items(section))
+    return settings
+
+
+def _read_settings(file_, keys):
+
+    """Read some settings from a file
+
+    All of the given *keys* are resolved against a single parse of the file,
+    so callers should request every key they need in one call instead of
+    invoking this once per key.
+
+    Parsed files are cached by modification time and size, so reading an
+    unchanged file costs only a :func:`os.stat`.  When all keys are
+    requested, the cached mapping itself is returned rather than a copy of
+    it; it must not be modified.
+
+    .. seealso:: :meth:`Settings.register_format
+                 <spruce.settings._core.Settings.register_format>`
+
+    """
+
+    flat = _load_settings(file_)
+
+    if keys == ['']:
+        return flat
+
+    get = flat.get
+    flat_key = _flat_key
+    return {key: get(flat_key(key)) for key in keys}
+
+
 def _write_settings(file_, settings):
     if settings:
-        # FIXME
+        _missing_files.pop(_os.path.abspath(file_), None)
+        # FIXME: serialize into an in-memory buffer and write *file_* in one
+        #   call, as :meth:`~spruce.settings.Settings.register_format` asks of
+        #   write functions
         raise NotImplementedError('writing \'conf\' settings is not yet'
                                   ' implemented')
 
 
+def _forget_missing_files(locations):
+    for location in locations:
+        _missing_files.pop(_os.path.abspath(location), None)
+
+
+def _set_default_paths():
+    for base_scope, component_scope, path in _DEFAULT_PATHS:
+        _core.Settings.set_path('conf', base_scope, component_scope,
+                                _os.path.expanduser(path))
+
+
 _core.Settings.register_format('conf', extension='.conf',
                                read_func=_read_settings,
-                               write_func=_write_settings)
-
-_homedir = _os.path.expanduser('~')
-_paths = {('system', 'organization'):
-              _os.path.join(_os.path.sep, 'etc', '{organization}',
-                            '{organization}{extension}'),
-          ('system', 'application'):
-              _os.path.join(_os.path.sep, 'etc', '{organization}',
-                            '{application}{extension}'),
-          ('system', 'subsystem'):
-              _os.path.join(_os.path.sep, 'etc', '{organization}',
-                            '{application}', '{subsystem}{extension}'),
-          ('user', 'organization'):
-              _os.path.join(_homedir, '.{organization}',
-                            '{organization}{extension}'),
-          ('user', 'application'):
-              _os.path.join(_homedir, '.{organization}',
-                            '{application}{extension}'),
-          ('user', 'subsystem'):
-              _os.path.join(_homedir, '.{organization}', '{application}',
-                            '{subsystem}{extension}'),
-          }
-for (_base_scope, _component_scope), _path in _paths.iteritems():
-    _core.Settings.set_path('conf', _base_scope, _component_scope, _path)
+                               write_func=_write_settings,
+                               paths_func=_set_default_paths,
+                               refresh_func=_forget_missing_files)
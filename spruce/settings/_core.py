@@ -3,15 +3,51 @@
 __copyright__ = "Copyright (C) 2014 Ivan D Vasin"
 __docformat__ = "restructuredtext"
 
-from collections import Mapping as _Mapping, namedtuple as _namedtuple
-from contextlib import closing as _closing, contextmanager as _contextmanager
-from datetime import datetime as _datetime, timedelta as _timedelta
+__all__ = ['Settings']
 
-from spruce.collections import odict as _odict
+from collections import namedtuple as _namedtuple
+from collections.abc import Mapping as _Mapping
+from contextlib import closing as _closing, contextmanager as _contextmanager
+from datetime import timedelta as _timedelta
+from importlib import import_module as _import_module
+import re as _re
+import sys as _sys
+from time import monotonic as _monotonic
+import weakref as _weakref
 
 from . import _exc
 
 
+_BASE_SCOPES = frozenset(('user', 'system'))
+
+_BOOL_FALSE_STRS = frozenset(('false', '0', 'no', 'off'))
+
+_BOOL_TRUE_STRS = frozenset(('true', '1', 'yes', 'on'))
+
+_COMPONENT_SCOPE_FALLBACK_ATTRS = \
+    {('subsystem', 'application'): '_fallback_subsystem_application',
+     ('subsystem', 'organization'): '_fallback_subsystem_organization',
+     ('application', 'organization'): '_fallback_application_organization'}
+
+_GREATER_COMPONENT_SCOPES = frozenset(('organization', 'application'))
+
+_GREATER_COMPONENTS = {'organization': (),
+                       'application': ('organization',),
+                       'subsystem': ('application', 'organization')}
+
+_LESSER_COMPONENT_SCOPES = frozenset(('application', 'subsystem'))
+
+_LIST_CLOSING_BRACKETS = {'[': ']', '(': ')', '{': '}'}
+
+# the result of looking up a setting that is absent or removed; setting values
+# are never this object, so it cannot be confused with a caller's *default*
+_MISSING = object()
+
+_PATH_FIELD_RE = _re.compile(r'\{(\w+)\}')
+
+_PATH_FIELDS = ('organization', 'application', 'subsystem', 'extension')
+
+
 class Settings(object):
 
     """Application settings
@@ -37,10 +73,10 @@ class Settings(object):
 
     The cache is synchronized to persistent storage via :meth:`sync`.  The
     cache is synchronized automatically just before the first time any
-    settings are accessed and just before the :class:`Settings` object is
-    destroyed.  Also, if a cache lifespan is set, the cache expires when its
-    age exceeds its lifespan; it is synchronized automatically just before
-    the next access thereafter.
+    settings are accessed and, while the :class:`Settings` object is
+    :meth:`open`, just before it is destroyed.  Also, if a cache lifespan is
+    set, the cache expires when its age exceeds its lifespan; it is
+    synchronized automatically just before the next access thereafter.
 
     This class is inspired by the `QSettings API`_.
 
@@ -94,6 +130,8 @@ class Settings(object):
     def __init__(self, organization, application=None, subsystem=None,
                  format='conf', base_scope='user'):
 
+        self._import_format(format)
+
         if format not in self._formats:
             raise ValueError('unregistered format {!r}'.format(format))
         elif not organization:
@@ -106,29 +144,32 @@ class Settings(object):
             raise ValueError('invalid application {!r}'.format(application))
         if subsystem is not None and not subsystem:
             raise ValueError('invalid subsystem {!r}'.format(subsystem))
-        if base_scope not in ['user', 'system']:
+        if base_scope not in _BASE_SCOPES:
             raise ValueError('invalid base_scope {!r}'.format(base_scope))
 
         self._application = application
         self._base_scope_fallback = True
         self._base_scope = base_scope
         self._cache_ = {}
-        self._cache_creationtime = None
+        self._cache_expiry = float('-inf')
         self._cache_lifespan = _timedelta(seconds=6)
-        self._component_fallback_enabled = \
-            {('subsystem', 'application'): True,
-             ('subsystem', 'organization'): True,
-             ('application', 'organization'): True}
+        self._cache_lifespan_seconds = 6.
+        self._cache_synctime = None
         self._defaults = self.__class__._Defaults(self)
-        self._deleting = False
+        self._defaults_nested = None
+        self._fallback_application_organization = True
+        self._fallback_subsystem_application = True
+        self._fallback_subsystem_organization = True
+        self._finalizer = None
         self._format = format
-        self._group = None
-        self._isopen = False
-        self._keys_in_primarylocation = set()
-        self._keystowrite = set()
+        self._group_prefix = ''
+        self._group_segments = []
+        self._keystowrite = {}
         self._locations = []
+        self._locations_version = None
         self._organization = organization
-        self._previous_groups = []
+        self._primary_path = None
+        self._primary_path_version = None
         self._subsystem = subsystem
 
         if subsystem is not None:
@@ -138,9 +179,7 @@ class Settings(object):
         else:
             self._component_scope = 'organization'
 
-    def __del__(self):
-        self._deleting = True
-        self.close()
+        self._set_default_paths(format)
 
     def absname(self, name):
         """The absolute name of a group or key
@@ -154,10 +193,7 @@ class Settings(object):
         :rtype: :obj:`str`
 
         """
-        if not self.group:
-            return name
-        else:
-            return self.group + '/' + name
+        return self._group_prefix + name
 
     @property
     def all_groups(self):
@@ -196,8 +232,9 @@ class Settings(object):
         :type: ~[:obj:`str`]
 
         """
-        return (self._descendant_key_name(key)
-                for key in filter(self._is_descendant_key, self._cache.keys()))
+        prefix = self._group_prefix
+        start = len(prefix)
+        return (key[start:] for key in self._cache if key.startswith(prefix))
 
     @property
     def application(self):
@@ -244,6 +281,7 @@ class Settings(object):
     @base_scope_fallback.setter
     def base_scope_fallback(self, enabled):
         self._base_scope_fallback = enabled
+        self._locations_version = None
 
     def boolvalue(self, key, default=None, required=False):
 
@@ -268,7 +306,8 @@ class Settings(object):
                 ``false``, ``0``, ``no``, ``off``
 
         .. note::
-            This is a convenience method that calls :meth:`value`.
+            This is a convenience method that reads the same setting as
+            :meth:`value`.
 
         .. seealso::
             :meth:`contains`, :meth:`remove`, :meth:`set_value`, and
@@ -297,18 +336,19 @@ class Settings(object):
 
         TYPE = 'boolean'
 
-        value = self.value(key, default=None, required=False)
+        value = self._lookup(key)
 
-        if value is None:
+        if value is _MISSING:
             if required:
                 raise _exc.MissingRequiredSettingsValue\
                        (self.absname(key), type=TYPE, locations=self.locations)
             else:
                 return default
 
-        if value.lower() in ['true', '1', 'yes', 'on']:
+        value_lower = value.lower()
+        if value_lower in _BOOL_TRUE_STRS:
             return True
-        if value.lower() in ['false', '0', 'no', 'off']:
+        if value_lower in _BOOL_FALSE_STRS:
             return False
 
         raise _exc.InvalidSettingsValue(self.absname(key), value, type=TYPE)
@@ -336,6 +376,16 @@ class Settings(object):
             raise TypeError('invalid cache lifespan type {}'
                              .format(lifespan.__class__))
         self._cache_lifespan = lifespan
+        if lifespan is None:
+            self._cache_lifespan_seconds = None
+            self._cache_expiry = None
+        else:
+            self._cache_lifespan_seconds = lifespan.total_seconds()
+            if self._cache_synctime is None:
+                self._cache_expiry = float('-inf')
+            else:
+                self._cache_expiry = \
+                    self._cache_synctime + self._cache_lifespan_seconds
 
     @property
     def child_groups(self):
@@ -353,8 +403,17 @@ class Settings(object):
         :type: ~[:obj:`str`]
 
         """
-        return {self._child_group_name(key) for key in self._cache.keys()
-                if self._in_child_group(key)}
+        prefix = self._group_prefix
+        start = len(prefix)
+        groups_seen = set()
+        for key in self._cache:
+            if key.startswith(prefix):
+                end = key.find('/', start)
+                if end != -1:
+                    group = key[start:end]
+                    if group not in groups_seen:
+                        groups_seen.add(group)
+                        yield group
 
     @property
     def child_keys(self):
@@ -371,8 +430,10 @@ class Settings(object):
         :type: ~[:obj:`str`]
 
         """
-        return (self._child_key_name(key)
-                for key in filter(self._is_child_key, self._cache.keys()))
+        prefix = self._group_prefix
+        start = len(prefix)
+        return (key[start:] for key in self._cache
+                if key.startswith(prefix) and key.find('/', start) == -1)
 
     def clear(self):
         """Remove all entries in the primary location
@@ -385,7 +446,7 @@ class Settings(object):
         .. warning:: **Bug:**
             Writing settings in the conf format is not yet implemented, so any
             synchronization after calling this will raise a
-            :exc:`~exceptions.NotImplementedError`.
+            :exc:`NotImplementedError`.
 
         .. note::
             This removes entries that were added after the last
@@ -395,16 +456,21 @@ class Settings(object):
 
         """
         self._keystowrite.clear()
-        self._keystowrite.add('')
-        self._cache = {'': None}
+        self._keystowrite[''] = None
+        self._cache_.clear()
+        self._cache_[''] = None
 
     def close(self):
         """Close this settings object
 
-        This triggers a call to :meth:`sync`.
+        This triggers a call to :meth:`sync`.  Once closed, this settings
+        object no longer synchronizes its pending changes when it is garbage
+        collected.
 
         """
-        if self._isopen:
+        if self._finalizer is not None:
+            self._finalizer.detach()
+            self._finalizer = None
             self.sync()
 
     @property
@@ -455,22 +521,22 @@ class Settings(object):
 
         """
 
-        if lesser_component not in ('application', 'subsystem'):
+        if lesser_component not in _LESSER_COMPONENT_SCOPES:
             raise ValueError('invalid lesser component scope {!r}'
                               .format(lesser_component))
-        if greater_component not in ('organization', 'application'):
+        if greater_component not in _GREATER_COMPONENT_SCOPES:
             raise ValueError('invalid greater component scope {!r}'
                               .format(greater_component))
-        if lesser_component == greater_component \
-               or greater_component == 'subsystem' \
-               or lesser_component == 'organization':
+        if (lesser_component, greater_component) \
+               not in _COMPONENT_SCOPE_FALLBACK_ATTRS:
             raise ValueError('the lesser component scope must be less than the'
                               ' greater component scope (lesser: {}; greater:'
                               ' {})'
                               .format(lesser_component, greater_component))
 
-        return self._component_fallback_enabled[(lesser_component,
-                                                 greater_component)]
+        return getattr(self,
+                       _COMPONENT_SCOPE_FALLBACK_ATTRS[(lesser_component,
+                                                        greater_component)])
 
     def contains(self, key):
         """
@@ -485,7 +551,7 @@ class Settings(object):
         :rtype: :obj:`bool`
 
         """
-        return key in self._cache
+        return self._lookup(key) is not _MISSING
 
     def copy(self):
 
@@ -495,26 +561,22 @@ class Settings(object):
 
         """
 
-        settings = Settings(organization=self.organization,
-                            application=self.application,
-                            subsystem=self.subsystem,
-                            format=self.format,
-                            base_scope=self.base_scope)
-        settings.defaults = self.defaults
-        settings.cache_lifespan = self.cache_lifespan
-
-        settings.base_scope_fallback = self.base_scope_fallback
-        for pair in (('subsystem', 'application'),
-                     ('subsystem', 'organization'),
-                     ('application', 'organization')):
-            settings.set_component_scope_fallback\
-             (pair[0], pair[1], self.component_scope_fallback(*pair))
-
-        settings._group = self.group
-        settings._previous_groups = self._previous_groups
-
-        settings._keystowrite = self._keystowrite
-        settings._keys_in_primarylocation = self._keys_in_primarylocation
+        # the state of these settings is already valid, so bypass the
+        # validation in :meth:`__init__` and copy it directly
+        settings = object.__new__(self.__class__)
+        for name in Settings.__slots__:
+            if name != '__weakref__':
+                setattr(settings, name, getattr(self, name))
+        if hasattr(self, '__dict__'):
+            settings.__dict__.update(self.__dict__)
+        settings._cache_ = dict(self._cache_)
+        if self._defaults is not None:
+            settings._defaults = self.__class__._Defaults(settings,
+                                                          self._defaults)
+        settings._finalizer = None
+        settings._group_segments = list(self._group_segments)
+        settings._keystowrite = dict(self._keystowrite)
+        settings._locations = list(self._locations)
 
         return settings
 
@@ -534,9 +596,44 @@ class Settings(object):
         methods, if a setting key is not found in any of the applicable
         locations, its value is retrieved from this mapping if it exists.
 
+        The given mapping is flattened into a mapping of absolute keys to
+        values when these defaults are first read, so any changes made to it
+        before then are reflected.
+
+        Setting an item in the flattened mapping triggers a :meth:`sync`.  A
+        call to its :meth:`~dict.update` method triggers only one, as do any
+        number of changes made in a :keyword:`with` block having the mapping
+        itself as the context::
+
+            with settings.defaults as defaults:
+                defaults['Book/Color'] = 'blue'
+                defaults['Book/Size'] = 'large'
+
         :type: {:obj:`str`: :obj:`object`}
 
         """
+
+        if self._defaults is None:
+
+            # walk the nested mapping depth first with an explicit stack of
+            # (group prefix, items iterator) pairs, so that the flattened
+            # items keep the order in which they were given
+            Mapping = _Mapping
+            defaults = {}
+            stack = [('', iter(self._defaults_nested.items()))]
+            while stack:
+                prefix, items = stack[-1]
+                for key, value in items:
+                    if isinstance(value, Mapping):
+                        stack.append((prefix + key + '/', iter(value.items())))
+                        break
+                    defaults[prefix + key] = value
+                else:
+                    stack.pop()
+
+            self._defaults = self.__class__._Defaults(self, defaults)
+            self._defaults_nested = None
+
         return self._defaults
 
     @defaults.setter
@@ -546,26 +643,8 @@ class Settings(object):
             raise TypeError('invalid defaults mapping type {}'
                              .format(defaults.__class__.__name__))
 
-        def flatten_defaults(parent_group, defaults):
-            defaults_new = self.__class__._Defaults(self)
-            for key, value in defaults.iteritems():
-                if isinstance(value, _Mapping):
-                    group = None
-                    if parent_group is None:
-                        group = key
-                    else:
-                        group = parent_group + '/' + key
-
-                    defaults_new.update(flatten_defaults(group, value))
-                else:
-                    if parent_group is None:
-                        defaults_new[key] = value
-                    else:
-                        defaults_new[parent_group + '/' + key] = value
-            return defaults_new
-
-        self._defaults = \
-            flatten_defaults(None, defaults if defaults is not None else {})
+        self._defaults = None
+        self._defaults_nested = defaults
 
     def floatvalue(self, key, default=None, required=False):
 
@@ -582,7 +661,8 @@ class Settings(object):
             raised.
 
         .. note::
-            This is a convenience method that calls :meth:`value`.
+            This is a convenience method that reads the same setting as
+            :meth:`value`.
 
         .. seealso::
             :meth:`contains`, :meth:`remove`, :meth:`set_value`, and
@@ -610,9 +690,9 @@ class Settings(object):
 
         TYPE = 'floating point'
 
-        value = self.value(key, default=None, required=False)
+        value = self._lookup(key)
 
-        if value is None:
+        if value is _MISSING:
             if required:
                 raise _exc.MissingRequiredSettingsValue\
                        (self.absname(key), type=TYPE, locations=self.locations)
@@ -657,7 +737,7 @@ class Settings(object):
         :type: :obj:`str`
 
         """
-        return self._group if self._group is not None else ''
+        return self._group_prefix[:-1]
 
     @_contextmanager
     def ingroup(self, group):
@@ -683,19 +763,19 @@ class Settings(object):
         """
 
         if group:
-            if not self.group:
-                self._group = group
-            else:
-                self._previous_groups.append(self.group)
-                self._group += '/' + group
+            self._group_segments.append(group)
+            self._group_prefix = \
+                _sys.intern('/'.join(self._group_segments) + '/')
 
         yield
 
         if group:
-            if self._previous_groups:
-                self._group = self._previous_groups.pop()
+            self._group_segments.pop()
+            if self._group_segments:
+                self._group_prefix = \
+                    _sys.intern('/'.join(self._group_segments) + '/')
             else:
-                self._group = None
+                self._group_prefix = ''
 
     def intvalue(self, key, default=None, required=False):
 
@@ -712,7 +792,8 @@ class Settings(object):
             raised.
 
         .. note::
-            This is a convenience method that calls :meth:`value`.
+            This is a convenience method that reads the same setting as
+            :meth:`value`.
 
         .. seealso::
             :meth:`contains`, :meth:`remove`, :meth:`set_value`, and
@@ -740,9 +821,9 @@ class Settings(object):
 
         TYPE = 'integer'
 
-        value = self.value(key, default=None, required=False)
+        value = self._lookup(key)
 
-        if value is None:
+        if value is _MISSING:
             if required:
                 raise _exc.MissingRequiredSettingsValue\
                        (self.absname(key), type=TYPE, locations=self.locations)
@@ -779,7 +860,8 @@ class Settings(object):
             value that is a singleton list that contains an empty string.
 
         .. note::
-            This is a convenience method that calls :meth:`value`.
+            This is a convenience method that reads the same setting as
+            :meth:`value`.
 
         .. seealso::
             :meth:`contains`, :meth:`remove`, :meth:`set_value`, and
@@ -807,9 +889,9 @@ class Settings(object):
 
         TYPE = 'list'
 
-        value = self.value(key, default=None, required=False)
+        value = self._lookup(key)
 
-        if value is None:
+        if value is _MISSING:
             if required:
                 raise _exc.MissingRequiredSettingsValue\
                        (self.absname(key), type=TYPE, locations=self.locations)
@@ -818,27 +900,17 @@ class Settings(object):
 
         value = value.strip()
 
-        if len(value) == 0:
+        if not value:
             return []
 
-        if len(value) >= 2:
-            if value[0] == '[' and value[-1] == ']' \
-                   or value[0] == '(' and value[-1] == ')' \
-                   or value[0] == '{' and value[-1] == '}':
-                value = value[1:-1]
+        # an opening bracket is never its own closing bracket, so this also
+        # rejects a lone bracket
+        if _LIST_CLOSING_BRACKETS.get(value[0]) == value[-1]:
+            value = value[1:-1]
 
-        if sep not in value:
-            if value:
-                return [value]
-            else:
-                return []
-
-        list_ = value.split(sep)
-
-        for index, item in enumerate(list_):
-            list_[index] = item.strip()
-
-        return list_
+        if sep in value:
+            return [item.strip() for item in value.split(sep)]
+        return [value] if value else []
 
     @property
     def locations(self):
@@ -850,14 +922,18 @@ class Settings(object):
         :attr:`format`.
 
         The locations are returned in the order in which they are inspected for
-        settings, highest precedence first.
+        settings, highest precedence first.  The returned list is a snapshot;
+        it is not affected by later synchronizations.
 
         .. seealso:: :meth:`set_path`
 
         :type: ~[:obj:`str`]
 
         """
-        return self._locations
+        # the internal list is updated in place by :meth:`sync`, so hand out a
+        # copy; exceptions that keep this and format their messages lazily
+        # then still report the locations as of when they were raised
+        return list(self._locations)
 
     def open(self):
         """A context in which this settings object is open for access
@@ -865,10 +941,18 @@ class Settings(object):
         Upon entering this context, :meth:`sync` is called.  Upon exiting this
         context, :meth:`close` is called.
 
+        While this settings object is open, any changes that are still pending
+        when it is garbage collected are written to the primary location.
+
         :rtype: context
 
         """
-        self._isopen = True
+        if self._finalizer is None:
+            self._finalizer = \
+                _weakref.finalize(self, _write_changes,
+                                  self._formats[self._format].write_func,
+                                  self._locations, self._cache_,
+                                  self._keystowrite)
         self.sync()
         return _closing(self)
 
@@ -894,7 +978,12 @@ class Settings(object):
         :type: :obj:`str`
 
         """
-        return self._paths[self.format][self.base_scope][self.component_scope]
+        if self._primary_path_version != self._paths_version:
+            self._primary_path = \
+                self._paths[self._format][self._base_scope]\
+                    [self._component_scope]
+            self._primary_path_version = self._paths_version
+        return self._primary_path
 
     def remove(self, key):
         """
@@ -907,7 +996,7 @@ class Settings(object):
         .. warning:: **Bug:**
             Writing settings in the conf format is not yet implemented, so any
             synchronization after calling this will raise a
-            :exc:`~exceptions.NotImplementedError`.
+            :exc:`NotImplementedError`.
 
         .. seealso:: :meth:`contains`, :meth:`set_value`, and :meth:`value`
 
@@ -915,8 +1004,9 @@ class Settings(object):
             A settings key or an empty string.
 
         """
+        key = _sys.intern(key)
         self._cache[key] = None
-        self._keystowrite.add(key)
+        self._keystowrite[key] = None
 
     def set_component_scope_fallback(self, lesser_component, greater_component,
                                      enabled):
@@ -957,23 +1047,24 @@ class Settings(object):
 
         """
 
-        if lesser_component not in ('application', 'subsystem'):
+        if lesser_component not in _LESSER_COMPONENT_SCOPES:
             raise ValueError('invalid lesser component scope {!r}'
                               .format(lesser_component))
-        if greater_component not in ('organization', 'application'):
+        if greater_component not in _GREATER_COMPONENT_SCOPES:
             raise ValueError('invalid greater component scope {!r}'
                               .format(greater_component))
-        if lesser_component == greater_component \
-               or greater_component == 'subsystem' \
-               or lesser_component == 'organization':
+        if (lesser_component, greater_component) \
+               not in _COMPONENT_SCOPE_FALLBACK_ATTRS:
             raise ValueError('the lesser component scope must be less than the'
                               ' greater component scope (lesser: {}; greater:'
                               ' {})'
                               .format(lesser_component, greater_component))
 
-        self._component_fallback_enabled[(lesser_component,
-                                          greater_component)] = \
-            enabled
+        setattr(self,
+                _COMPONENT_SCOPE_FALLBACK_ATTRS[(lesser_component,
+                                                 greater_component)],
+                enabled)
+        self._locations_version = None
 
     def set_value(self, key, value):
 
@@ -985,7 +1076,7 @@ class Settings(object):
         .. warning:: **Bug:**
             Writing settings in the conf format is not yet implemented, so any
             synchronization after calling this will raise a
-            :exc:`~exceptions.NotImplementedError`.
+            :exc:`NotImplementedError`.
 
         .. note::
             :samp:`set_value({key}, None)` has the same effect as
@@ -999,15 +1090,18 @@ class Settings(object):
 
         """
 
-        abskey = self.absname(key)
+        abskey = _sys.intern(self._group_prefix + key)
 
-        if isinstance(value, str) or isinstance(value, unicode):
-            self._cache[abskey] = value
-        else:
-            self._cache[abskey] = repr(value)
+        # test the common exact types before falling back to the general case
+        value_type = type(value)
+        if value_type is not str and value is not None:
+            if value_type is int or value_type is float or value_type is bool:
+                value = str(value)
+            elif not isinstance(value, str):
+                value = repr(value)
+        self._cache[abskey] = value
 
-        self._keys_in_primarylocation.add(abskey)
-        self._keystowrite.add(abskey)
+        self._keystowrite[abskey] = None
 
     @property
     def subsystem(self):
@@ -1030,15 +1124,20 @@ class Settings(object):
 
         This function is called by :meth:`open` and :meth:`close`.
 
+        Every location is examined afresh, including any that the format
+        recently found to be missing.  The automatic synchronizations that
+        precede accesses to an expired cache may skip such locations for a
+        short while.
+
         .. warning:: **Bug:**
             Writing settings in the conf format is not yet implemented, so
             calling this after calling one of the mutator methods will raise a
-            :exc:`~exceptions.NotImplementedError`.
+            :exc:`NotImplementedError`.
 
         .. note:: **TODO:**
             conflict detection, resolution, exceptions
 
-        :raise EnvironmentError:
+        :raise OSError:
             Raised if an error is encountered outside the Python system while
             reading or writing settings to persistent storage.
 
@@ -1046,81 +1145,7 @@ class Settings(object):
             Raised if a malformed settings location is encountered.
 
         """
-
-        format_ = self._formats[self.format]
-        read = format_.read_func
-        write = format_.write_func
-
-        # determine all applicable locations
-        locations = []
-        locations.append(self._paths[self.format]
-                                    [self.base_scope]
-                                    [self.component_scope])
-        for greater_component \
-                in self._greater_components(self.component_scope):
-            if self.component_scope_fallback(self.component_scope,
-                                             greater_component):
-                locations.append(self._paths[self.format]
-                                            [self.base_scope]
-                                            [greater_component])
-        if self.base_scope == 'user' and self.base_scope_fallback:
-            locations.append(self._paths[self.format]
-                                        ['system']
-                                        [self.component_scope])
-            for greater_component \
-                    in self._greater_components(self.component_scope):
-                if self.component_scope_fallback(self.component_scope,
-                                                 greater_component):
-                    locations.append(self._paths[self.format]
-                                                ['system']
-                                                [greater_component])
-        for index, location in enumerate(locations):
-            location = location.replace('{organization}', self.organization)
-            if self.application is not None:
-                location = location.replace('{application}', self.application)
-            if self.subsystem is not None:
-                location = location.replace('{subsystem}', self.subsystem)
-            location = location.replace('{extension}', format_.extension)
-            locations[index] = location
-        self._locations = locations
-
-        # actuate :meth:`clear`
-        if '' in self._keystowrite:
-            assert '' in self._cache_
-            assert self._cache_[''] is None
-
-            write(self.locations[0], {'': None})
-
-            self._keystowrite.remove('')
-            del self._cache_['']
-
-        # actuate :meth:`set_value` and :meth:`remove`
-        try:
-            write(self.locations[0],
-                  _odict((key, value)
-                         for key, value in self._cache_.iteritems()
-                         if key in self._keystowrite))
-        except _exc.MalformedSettingsLocation as exc:
-            raise _exc.MalformedSettingsLocation(self.locations[0],
-                                                 message=exc.message_)
-
-        # update :attr:`_cache_` and :attr:`_keys_in_primarylocation`
-        if not self._deleting:
-            self._cache_.clear()
-            self._cache_.update({key: str(value)
-                                 for key, value in self.defaults.items()})
-            for index, location in enumerate(reversed(self.locations)):
-                try:
-                    location_settings = read(location, [''])
-                except _exc.MalformedSettingsLocation as exc:
-                    raise _exc.MalformedSettingsLocation(location,
-                                                         message=exc.message_)
-                self._cache_.update(location_settings)
-
-                if index == len(self.locations) - 1:
-                    self._keys_in_primarylocation = \
-                        set(location_settings.keys())
-            self._cache_creationtime = _datetime.now()
+        self._sync(refresh=True)
 
     def value(self, key, default=None, required=False):
 
@@ -1159,17 +1184,15 @@ class Settings(object):
 
         """
 
-        abskey = self.absname(key)
+        value = self._lookup(key)
 
-        if abskey in self._cache and self._cache[abskey] is not None:
-            return self._cache[abskey]
+        if value is not _MISSING:
+            return value
+        elif required:
+            raise _exc.MissingRequiredSettingsValue(self.absname(key),
+                                                    locations=self.locations)
         else:
-            if required:
-                raise _exc.MissingRequiredSettingsValue(abskey,
-                                                        locations=
-                                                            self.locations)
-            else:
-                return default
+            return default
 
     @property
     def writable(self):
@@ -1189,9 +1212,14 @@ class Settings(object):
         return False
 
     @classmethod
-    def register_format(cls, name, extension, read_func, write_func):
+    def register_format(cls, name, extension, read_func, write_func,
+                        paths_func=None, refresh_func=None):
         """Register a storage format
 
+        Registering a format under the name of an existing format replaces
+        it, including a built-in format whose module has not been loaded
+        yet.
+
         :param str name:
             A string that is unique among settings formats.
 
@@ -1217,11 +1245,18 @@ class Settings(object):
                     an empty string.  If a setting is omitted, its key should
                     be mapped to :obj:`None`.
 
-                  * :exc:`~exceptions.EnvironmentError` is raised if an error
+                  * :exc:`OSError` is raised if an error
                     is encountered outside the Python system.
 
                   * :exc:`~spruce.settings._exc.MalformedSettingsLocation` is
                     raised if a malformed location is encountered.
+
+            It is called once per location in each :meth:`sync`, with all
+            keys requested in a single batch, so any per-call cost of
+            reading *file* is paid once per location rather than once per
+            key.  The returned *settings* are never modified, so a format
+            that caches what it reads from an unchanged *file* may return
+            the same mapping each time.
         :type read_func: :obj:`file`, [:obj:`str`] -> {:obj:`str`: :obj:`str`}
 
         :param write_func:
@@ -1238,22 +1273,52 @@ class Settings(object):
                     that should be assigned to them.  If a setting should be
                     blank, its key should be mapped to an empty string.  If a
                     setting should be omitted, its key should be mapped to
-                    :obj:`None`.  The special mapping :code:`{'': None}`
-                    indicates that all settings should be cleared.
+                    :obj:`None`.  The special key :code:`''`, always mapped
+                    to :obj:`None`, indicates that all settings should be
+                    cleared before the other items in *settings* are applied.
 
-                  * :exc:`~exceptions.EnvironmentError` is raised if an error
+                  * :exc:`OSError` is raised if an error
                     is encountered outside the Python system.
 
                   * :exc:`~spruce.settings._exc.MalformedSettingsLocation` is
                     raised if a malformed location is encountered.
+
+            It is called with all the changes made since the last
+            :meth:`sync` in a single batch.  It should serialize *settings* in
+            memory and write the result to *file* in one operation, rather
+            than writing to *file* once per setting.
         :type write_func: :obj:`file`, {:obj:`str`: :obj:`str`} ->
 
+        :param paths_func:
+            A function that sets the format's default paths via
+            :meth:`set_path`.  It is called once, just before the format's
+            paths are first needed---that is, when the first settings object
+            in this format is created or when :meth:`set_path` is first called
+            for this format, whichever comes first.  This keeps the cost of
+            building the paths out of import time.
+        :type paths_func: ``->`` or null
+
+        :param refresh_func:
+            A function that discards anything the format remembers about the
+            given locations between reads, such as which of them do not
+            exist.  It is called with the locations about to be read at the
+            start of each explicit :meth:`sync`, so that an explicit
+            synchronization sees every external change, while the automatic
+            synchronizations that precede accesses may still be answered from
+            such memory.
+        :type refresh_func: ~[:obj:`str`] -> or null
+
         .. seealso:: :meth:`set_path`
 
         """
         cls._formats[name] = \
             cls._Format(name=name, extension=extension, read_func=read_func,
-                        write_func=write_func)
+                        write_func=write_func, refresh_func=refresh_func)
+        cls._format_modules.pop(name, None)
+        if paths_func is not None:
+            cls._default_paths_funcs[name] = paths_func
+        else:
+            cls._default_paths_funcs.pop(name, None)
 
     @classmethod
     def set_path(cls, format, base_scope, component_scope, path):
@@ -1304,82 +1369,316 @@ class Settings(object):
 
         """
 
-        if format not in cls._paths:
-            cls._paths[format] = {}
-        if base_scope not in cls._paths[format]:
-            cls._paths[format][base_scope] = {}
+        cls._import_format(format)
+        cls._set_default_paths(format)
 
-        cls._paths[format][base_scope][component_scope] = path
+        cls._paths.setdefault(format, {}).setdefault(base_scope, {})\
+                  [component_scope] = path
+        cls._path_templates[(format, base_scope, component_scope)] = \
+            _compile_path(path)
+        Settings._paths_version += 1
 
     @property
     def _cache(self):
-        if self._cache_lifespan is not None:
-            min_creation_time = _datetime.now() - self._cache_lifespan
-            if self._cache_creationtime is None \
-                   or self._cache_creationtime < min_creation_time:
-                self.sync()
+        expiry = self._cache_expiry
+        if expiry is not None and _monotonic() >= expiry:
+            self._sync(refresh=False)
         return self._cache_
 
-    def _child_group_name(self, key):
-        relative_key = None
-        if not self.group:
-            relative_key = key
-        else:
-            relative_key = key[(len(self.group) + 1):]
-        return relative_key[:relative_key.index('/')]
+    def _greater_components(self, component):
+        return _GREATER_COMPONENTS[component]
 
-    def _child_key_name(self, key):
-        if not self.group:
-            return key
-        else:
-            return key[(len(self.group) + 1):]
+    def _lookup(self, key):
+        # this is the hot path of every read, so check the cache's freshness
+        # here directly instead of going through :attr:`_cache`
+        expiry = self._cache_expiry
+        if expiry is not None and _monotonic() >= expiry:
+            self._sync(refresh=False)
+        # removed settings are cached as null
+        value = self._cache_.get(self._group_prefix + key)
+        return _MISSING if value is None else value
 
-    def _descendant_key_name(self, key):
-        if not self.group:
-            return key
-        else:
-            return key[(len(self.group) + 1):]
+    def _sync(self, refresh):
 
-    def _greater_components(self, component):
-        if component == 'organization':
-            return []
-        greater_components = []
-        if component == 'subsystem':
-            greater_components.append('application')
-        greater_components.append('organization')
-        return greater_components
-
-    def _in_child_group(self, key):
-        if not self.group:
-            return True
-        else:
-            return key.startswith(self.group + '/') \
-                   and '/' in key[(len(self.group) + 1):]
+        """Synchronize the cache with persistent storage
 
-    def _is_child_key(self, key):
-        if not self.group:
-            return '/' not in key
-        else:
-            return key.startswith(self.group + '/') \
-                   and '/' not in key[(len(self.group) + 1):]
+        This is the implementation of :meth:`sync`, which refreshes; the
+        automatic synchronizations that precede accesses to an expired cache
+        do not.
+
+        :param bool refresh:
+            Whether to have the format discard anything it remembers about
+            the locations before reading them.  See the *refresh_func* of
+            :meth:`register_format`.
+
+        """
+
+        format_ = self._formats[self._format]
+        read = format_.read_func
+        write = format_.write_func
+
+        # determine all applicable locations, unless the fallback settings and
+        # the configured paths are unchanged since they were last determined
+        if self._locations_version != self._paths_version:
+            lesser_component = self._component_scope
+            component_scopes = [lesser_component]
+            for greater_component \
+                    in self._greater_components(lesser_component):
+                fallback_attr = \
+                    _COMPONENT_SCOPE_FALLBACK_ATTRS[(lesser_component,
+                                                     greater_component)]
+                if getattr(self, fallback_attr):
+                    component_scopes.append(greater_component)
+            scopes = [(self._base_scope, component_scope)
+                      for component_scope in component_scopes]
+            if self._base_scope == 'user' and self._base_scope_fallback:
+                scopes.extend(('system', component_scope)
+                              for component_scope in component_scopes)
+            # fields without values are left unsubstituted
+            application = self._application \
+                              if self._application is not None \
+                              else '{application}'
+            subsystem = self._subsystem if self._subsystem is not None \
+                                       else '{subsystem}'
+            locations = [self._path_templates[(self._format, base_scope,
+                                               component_scope)]
+                          (self._organization, application, subsystem,
+                           format_.extension)
+                         for base_scope, component_scope in scopes]
+            self._locations[:] = locations
+            self._locations_version = self._paths_version
+
+        # actuate :meth:`clear`, :meth:`set_value`, and :meth:`remove`
+        _write_changes(write, self._locations, self._cache_, self._keystowrite)
+
+        # update :attr:`_cache_`
+        if refresh and format_.refresh_func is not None:
+            format_.refresh_func(self._locations)
+        self._cache_.clear()
+        self._cache_.update(self.defaults.cache_items())
+        for location in reversed(self._locations):
+            try:
+                location_settings = read(location, [''])
+            except _exc.MalformedSettingsLocation as exc:
+                raise _exc.MalformedSettingsLocation(location,
+                                                     message=exc.message)
+            self._cache_.update(location_settings)
+        self._cache_synctime = _monotonic()
+        if self._cache_lifespan_seconds is not None:
+            self._cache_expiry = \
+                self._cache_synctime + self._cache_lifespan_seconds
+
+    @classmethod
+    def _import_format(cls, format):
+        module = cls._format_modules.pop(format, None)
+        if module is not None:
+            _import_module(module)
+
+    @classmethod
+    def _register_format_module(cls, name, module):
+        """Register the module that registers some format when imported
+
+        The module is imported just before the format is first needed, so
+        that programs that never use the format do not pay for loading it.
 
-    def _is_descendant_key(self, key):
-        return not self.group or key.startswith(self.group + '/')
+        """
+        cls._format_modules[name] = module
+
+    @classmethod
+    def _set_default_paths(cls, format):
+        paths_func = cls._default_paths_funcs.pop(format, None)
+        if paths_func is not None:
+            paths_func()
 
     class _Defaults(dict):
 
-        def __init__(self, settings):
+        def __init__(self, settings, *args):
+            super(Settings._Defaults, self).__init__(*args)
+            self._batch_depth = 0
+            self._cache_items = None
+            self._pending_sync = False
             self._settings = settings
 
+        def __delitem__(self, name):
+            super(Settings._Defaults, self).__delitem__(name)
+            self._cache_items = None
+
+        def __enter__(self):
+            self._batch_depth += 1
+            return self
+
+        def __exit__(self, exc_type, exc_value, traceback):
+            self._batch_depth -= 1
+            if not self._batch_depth and self._pending_sync:
+                self._pending_sync = False
+                self._settings.sync()
+
+        def __ior__(self, other):
+            self.update(other)
+            return self
+
         def __setitem__(self, name, value):
             super(Settings._Defaults, self).__setitem__(name, value)
-            self._settings.sync()
+            self._changed()
+
+        def cache_items(self):
+            """These defaults as they are stored in the settings cache
+
+            The string forms of the values, keyed by interned keys, are
+            computed once and reused by each :meth:`Settings.sync` until these
+            defaults are changed.
+
+            :rtype: {:obj:`str`: :obj:`str`}
+
+            """
+            if self._cache_items is None:
+                intern = _sys.intern
+                self._cache_items = {intern(key): str(value)
+                                     for key, value in self.items()}
+            return self._cache_items
+
+        def clear(self):
+            super(Settings._Defaults, self).clear()
+            self._cache_items = None
+
+        def pop(self, *args):
+            value = super(Settings._Defaults, self).pop(*args)
+            self._cache_items = None
+            return value
+
+        def popitem(self):
+            item = super(Settings._Defaults, self).popitem()
+            self._cache_items = None
+            return item
+
+        def setdefault(self, name, value=None):
+            value = super(Settings._Defaults, self).setdefault(name, value)
+            self._cache_items = None
+            return value
+
+        def update(self, *args, **kwargs):
+            super(Settings._Defaults, self).update(*args, **kwargs)
+            self._changed()
+
+        def _changed(self):
+            self._cache_items = None
+            if self._batch_depth:
+                self._pending_sync = True
+            else:
+                self._settings.sync()
 
     class _Format(_namedtuple('_Format',
                               ('name', 'extension', 'read_func',
-                               'write_func'))):
+                               'write_func', 'refresh_func'))):
         pass
 
+    __slots__ = ('__weakref__', '_application', '_base_scope',
+                 '_base_scope_fallback', '_cache_', '_cache_expiry',
+                 '_cache_lifespan', '_cache_lifespan_seconds',
+                 '_cache_synctime', '_component_scope', '_defaults',
+                 '_defaults_nested', '_fallback_application_organization',
+                 '_fallback_subsystem_application',
+                 '_fallback_subsystem_organization', '_finalizer', '_format',
+                 '_group_prefix', '_group_segments', '_keystowrite',
+                 '_locations', '_locations_version', '_organization',
+                 '_primary_path', '_primary_path_version', '_subsystem')
+
+    _default_paths_funcs = {}
+
+    _format_modules = {}
+
     _formats = {}
 
+    _path_templates = {}
+
     _paths = {}
+
+    _paths_version = 0
+
+
+def _compile_path(path):
+
+    """Compile a path template into a function that resolves it
+
+    The returned function takes the values of the fields named in
+    :data:`_PATH_FIELDS` as positional arguments, in that order, and returns
+    the resolved path.  It is generated as a single f-string over its
+    arguments and the template's literal text, so resolving a path builds
+    one string in one step.  Any other field is kept as literal text.
+
+    :param str path:
+        A path template, as given to :meth:`Settings.set_path`.
+
+    :rtype: :obj:`str`, :obj:`str`, :obj:`str`, :obj:`str` -> :obj:`str`
+
+    """
+
+    literals = {}
+    pieces = []
+    for index, part in enumerate(_PATH_FIELD_RE.split(path)):
+        if index % 2:
+            if part in _PATH_FIELDS:
+                pieces.append(part)
+                continue
+            part = '{' + part + '}'
+        if part:
+            name = '_{}'.format(len(literals))
+            literals[name] = part
+            pieces.append(name)
+
+    params = _PATH_FIELDS + tuple('{0}={0}'.format(name) for name in literals)
+    source = 'lambda {}: f"{}"'.format(', '.join(params),
+                                       ''.join('{' + piece + '}'
+                                               for piece in pieces))
+    return eval(source, literals)
+
+
+def _write_changes(write, locations, cache, keystowrite):
+
+    """Write pending settings changes to the primary location
+
+    This is the write phase of :meth:`Settings.sync`.  It is also run by the
+    finalizer of an open :class:`Settings` object, so it works only with the
+    object's state containers rather than the object itself.
+
+    :param write:
+        The format's write function.
+    :type write:
+        (:obj:`str`, {:obj:`str`: :obj:`str` or null}) -> :obj:`None`
+
+    :param locations:
+        The locations used in the last synchronization.  The first one is the
+        primary location.
+    :type locations: ~[:obj:`str`]
+
+    :param cache:
+        The settings cache.
+    :type cache: {:obj:`str`: :obj:`str` or null}
+
+    :param keystowrite:
+        The keys that have changed since the last synchronization, in the
+        order in which they were first changed.  This is an ordered set: only
+        its keys are meaningful.  It is emptied once they are written.
+    :type keystowrite: {:obj:`str`: null}
+
+    :raise spruce.settings.MalformedSettingsLocation:
+        The primary location is malformed.
+
+    """
+
+    if not locations or not keystowrite:
+        return
+
+    # actuate :meth:`Settings.clear`, :meth:`Settings.set_value`, and
+    # :meth:`Settings.remove` in a single write; :meth:`Settings.clear`
+    # resets *keystowrite* to :code:`{'': None}`, so a pending clear always
+    # comes first
+    changes = {key: cache[key] for key in keystowrite}
+    assert changes.get('') is None
+    try:
+        write(locations[0], changes)
+    except _exc.MalformedSettingsLocation as exc:
+        raise _exc.MalformedSettingsLocation(locations[0],
+                                             message=exc.message)
+    cache.pop('', None)
+    keystowrite.clear()
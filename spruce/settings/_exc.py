@@ -3,7 +3,10 @@
 __copyright__ = "Copyright (C) 2014 Ivan D Vasin"
 __docformat__ = "restructuredtext"
 
-import exceptions as _py_exc
+__all__ = ['Error', 'Exception', 'InvalidSettingsValue',
+           'MalformedSettingsLocation', 'MissingRequiredSettingsValue']
+
+import builtins as _py_exc
 
 
 class Exception(_py_exc.Exception):
@@ -47,13 +50,10 @@ class InvalidSettingsValue(Error):
         self._value = value
 
     def __str__(self):
-        value_str = u'value {!r} for {!r}'.format(self.value, self.key)
-        if self.type:
-            value_str = u'{} {}'.format(self.type, value_str)
-        message = u'invalid {} in persistent settings'.format(value_str)
-        if self.message:
-            message += u': {}'.format(self.message)
-        return message
+        type_str = f'{self.type} ' if self.type else ''
+        message_str = f': {self.message}' if self.message else ''
+        return (f'invalid {type_str}value {self.value!r} for {self.key!r} in'
+                f' persistent settings{message_str}')
 
     @property
     def key(self):
@@ -93,12 +93,9 @@ class MalformedSettingsLocation(Error):
         self._message = message
 
     def __str__(self):
-        message = 'malformed persistent settings'
-        if self.location:
-            message += u' at {!r}'.format(self.location)
-        if self.message:
-            message += u': {}'.format(self.message)
-        return message
+        location_str = f' at {self.location!r}' if self.location else ''
+        message_str = f': {self.message}' if self.message else ''
+        return f'malformed persistent settings{location_str}{message_str}'
 
     @property
     def location(self):
@@ -143,14 +140,10 @@ class MissingRequiredSettingsValue(Error):
         self._type = type
 
     def __str__(self):
-        required_value_str = u'value for {!r}'.format(self.key)
-        if self.type:
-            required_value_str = u'{} {}'.format(self.type, required_value_str)
-        message = u'missing required {} in persistent settings'\
-                   .format(required_value_str)
-        if self.locations:
-            message += u' at {}'.format(self.locations)
-        return message
+        type_str = f'{self.type} ' if self.type else ''
+        locations_str = f' at {self.locations}' if self.locations else ''
+        return (f'missing required {type_str}value for {self.key!r} in'
+                f' persistent settings{locations_str}')
 
     @property
     def key(self):
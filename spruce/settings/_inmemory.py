@@ -7,41 +7,48 @@ This is a volatile (not persistent) settings representation format.
 __copyright__ = "Copyright (C) 2014 Ivan D Vasin"
 __docformat__ = "restructuredtext"
 
+__all__ = []
+
 from . import _core
 
 
+_DEFAULT_PATHS = \
+    (('system', 'organization', 'system/{organization}'),
+     ('system', 'application', 'system/{organization}/{application}'),
+     ('system', 'subsystem',
+      'system/{organization}/{application}/{subsystem}'),
+     ('user', 'organization', 'user/{organization}'),
+     ('user', 'application', 'system/{organization}/{application}'),
+     ('user', 'subsystem', 'system/{organization}/{application}/{subsystem}'),
+     )
+
 _STORED_SETTINGS = {}
 
 
 def _read_settings(_, keys):
     if keys == ['']:
-        return _STORED_SETTINGS.copy()
+        # the caller never modifies what it reads, so there is no need to copy
+        return _STORED_SETTINGS
     else:
         return {key: _STORED_SETTINGS[key] if key in _STORED_SETTINGS else None
                 for key in keys}
 
 
 def _write_settings(_, settings):
-    global _STORED_SETTINGS
-    for key, value in settings.iteritems():
-        _STORED_SETTINGS[key] = value
+    if '' in settings:
+        _STORED_SETTINGS.clear()
+        _STORED_SETTINGS.update(settings)
+        del _STORED_SETTINGS['']
+    else:
+        _STORED_SETTINGS.update(settings)
+
+
+def _set_default_paths():
+    for base_scope, component_scope, path in _DEFAULT_PATHS:
+        _core.Settings.set_path('inmemory', base_scope, component_scope, path)
 
 
 _core.Settings.register_format('inmemory', extension='',
                                read_func=_read_settings,
-                               write_func=_write_settings)
-_paths = {('system', 'organization'): '/'.join(('system', '{organization}')),
-          ('system', 'application'):
-              '/'.join(('system', '{organization}', '{application}')),
-          ('system', 'subsystem'):
-              '/'.join(('system', '{organization}', '{application}',
-                        '{subsystem}')),
-          ('user', 'organization'): '/'.join(('user', '{organization}')),
-          ('user', 'application'):
-              '/'.join(('system', '{organization}', '{application}')),
-          ('user', 'subsystem'):
-              '/'.join(('system', '{organization}', '{application}',
-                        '{subsystem}')),
-          }
-for (_base_scope, _component_scope), _path in _paths.iteritems():
-    _core.Settings.set_path('inmemory', _base_scope, _component_scope, _path)
+                               write_func=_write_settings,
+                               paths_func=_set_default_paths)